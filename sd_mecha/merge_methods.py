@@ -23,7 +23,9 @@ def weighted_sum(
     alpha: Hyper = 0.5,
     **kwargs,
 ) -> Tensor | SameMergeSpace:
-    return (1 - alpha) * a + alpha * b
+    # torch.lerp does not promote dtypes like arithmetic does
+    dtype = torch.result_type(a, b)
+    return torch.lerp(a.to(dtype), b.to(dtype), alpha)
 
 # Isotropic merge / Uniform Soup / Uniform Merge... you name it.
 # Instead of running average, this may run faster. 
@@ -42,8 +44,10 @@ def slerp(
     alpha: Hyper = 0.5,
     **kwargs,
 ) -> Tensor | SameMergeSpace:
-    a_normalized = a / a.norm()
-    b_normalized = b / b.norm()
+    a_norm = a.norm()
+    b_norm = b.norm()
+    a_normalized = a / a_norm
+    b_normalized = b / b_norm
 
     ab_dot = (a_normalized * b_normalized).sum().clamp(-1, 1)
 
@@ -51,10 +55,9 @@ def slerp(
     a_contrib = a_normalized * torch.sin((1-alpha)*omega)
     b_contrib = b_normalized * torch.sin(alpha*omega)
     res = (a_contrib + b_contrib) / torch.sin(omega)
-    res *= weighted_sum.__wrapped__(a.norm(), b.norm(), alpha=alpha)
-    if res.isnan().any():
-        return weighted_sum.__wrapped__(a, b, alpha=alpha)
-    return res
+    res *= weighted_sum.__wrapped__(a_norm, b_norm, alpha=alpha)
+    # (anti)parallel or zero inputs divide by sin(omega) == 0. fallback without syncing with the device
+    return torch.where(torch.isfinite(res), res, weighted_sum.__wrapped__(a, b, alpha=alpha))
 
 
 @convert_to_recipe
@@ -65,7 +68,7 @@ def add_difference(
     alpha: Hyper = 1.0,
     **kwargs,
 ) -> Tensor | SameMergeSpace:
-    return a + alpha * b
+    return torch.add(a, b, alpha=alpha)
 
 
 @convert_to_recipe
@@ -85,9 +88,7 @@ def perpendicular_component(
 ) -> Tensor | SameMergeSpace:
     norm_a = torch.linalg.norm(a)
     res = b - a * (a / norm_a * (b / norm_a)).sum()
-    if res.isnan().any():
-        return torch.zeros_like(a)
-    return res
+    return torch.nan_to_num(res, nan=0.0, posinf=float("inf"), neginf=float("-inf"))
 
 
 @convert_to_recipe
@@ -98,10 +99,10 @@ def geometric_sum(
     alpha: Hyper = 0.5,
     **kwargs,
 ) -> Tensor | LiftFlag[MergeSpace.DELTA]:
-    a = torch.complex(a, torch.zeros_like(a))
-    b = torch.complex(b, torch.zeros_like(b))
-    res = a ** (1 - alpha) * b ** alpha
-    return res.real
+    # real part of the principal complex power, without going through complex tensors:
+    # a negative base contributes half a turn per unit of exponent to the phase
+    phase = (a < 0).to(a.dtype).mul_(1 - alpha).add_((b < 0).to(a.dtype), alpha=alpha).mul_(math.pi)
+    return torch.abs(a).pow_(1 - alpha).mul_(torch.abs(b).pow_(alpha)).mul_(phase.cos_())
 
 
 @convert_to_recipe
@@ -112,9 +113,9 @@ def add_cosine_a(
     alpha: Hyper,
     **kwargs,
 ) -> Tensor | LiftFlag[MergeSpace.BASE]:
-    a_norm = torch.nn.functional.normalize(a, dim=0)
-    b_norm = torch.nn.functional.normalize(b, dim=0)
-    similarity = torch.nn.functional.cosine_similarity(a_norm, b_norm, dim=0)
+    a_norms = torch.linalg.vector_norm(a, dim=0).clamp_min(EPSILON)
+    b_norms = torch.linalg.vector_norm(b, dim=0).clamp_min(EPSILON)
+    similarity = torch.sum(a * b, dim=0) / (a_norms * b_norms)
     return add_cosine_generic(a, b, alpha, similarity)
 
 
@@ -126,9 +127,12 @@ def add_cosine_b(
     alpha: Hyper,
     **kwargs,
 ) -> Tensor | LiftFlag[MergeSpace.BASE]:
-    similarity = torch.nn.functional.cosine_similarity(a, b, dim=0)
-    dot_product = torch.sum(a * b)
-    magnitude_similarity = dot_product / (torch.norm(a) * torch.norm(b))
+    # column norms and dot products are shared by both similarities
+    a_norms = torch.linalg.vector_norm(a, dim=0)
+    b_norms = torch.linalg.vector_norm(b, dim=0)
+    dot_products = torch.sum(a * b, dim=0)
+    similarity = dot_products / (a_norms * b_norms).clamp_min(EPSILON)
+    magnitude_similarity = dot_products.sum() / (torch.linalg.vector_norm(a_norms) * torch.linalg.vector_norm(b_norms))
     combined_similarity = (similarity + magnitude_similarity) / 2.0
     return add_cosine_generic(a, b, alpha, combined_similarity)
 
@@ -196,7 +200,7 @@ def ties_sum(  # aka add_difference_ties
 
     if apply_median <= 0.0:
         # Model Stock
-        t = 1.0 if apply_stock <= 0.0 else get_model_stock_t(torch.unbind(filtered_delta), cos_eps=cos_eps)
+        t = 1.0 if apply_stock <= 0.0 else get_model_stock_t(filtered_delta, cos_eps=cos_eps)
 
         filtered_delta = filtered_delta.sum(dim=0)
 
@@ -204,15 +208,16 @@ def ties_sum(  # aka add_difference_ties
         return torch.nan_to_num(filtered_delta * t / param_counts)   
     else:
         # $$ \tau_m $$, but in geometric median instead of arithmetic mean. Considered to replace model stock.
-        filtered_delta = geometric_median_list_of_array(torch.unbind(filtered_delta), eps=eps, maxiter=maxiter, ftol=ftol)
+        filtered_delta = geometric_median_list_of_array(filtered_delta, eps=eps, maxiter=maxiter, ftol=ftol)
         
         return torch.nan_to_num(filtered_delta)
 
 
 def filter_top_k(a: Tensor, k: float):
     k = max(int((1 - k) * torch.numel(a)), 1)
-    k_value, _ = torch.kthvalue(torch.abs(a.flatten()).float(), k)
-    top_k_filter = (torch.abs(a) >= k_value).float()
+    a_abs = torch.abs(a)
+    k_value, _ = torch.kthvalue(a_abs.flatten(), k)
+    top_k_filter = (a_abs >= k_value).float()
     return a * top_k_filter
 
 
@@ -249,29 +254,39 @@ def top_k_tensor_sum(
     **kwargs,
 ) -> Tensor | SameMergeSpace:
     a_flat = torch.flatten(a)
-    a_dist = torch.msort(a_flat)
+    a_dist, _ = a_flat.sort()
     b_indices = torch.argsort(torch.flatten(b), stable=True)
-    redist_indices = torch.argsort(b_indices)
 
     start_i, end_i, region_is_inverted = ratio_to_region(width, offset, torch.numel(a))
-    start_top_k = kth_abs_value(a_dist, start_i)
-    end_top_k = kth_abs_value(a_dist, end_i)
+    a_abs_dist = torch.abs(a_dist)
+    # a_dist is sorted by signed value, its magnitudes still need one sort
+    a_abs_sorted = torch.msort(a_abs_dist)
+    start_top_k = kth_abs_value(a_abs_sorted, start_i)
+    end_top_k = kth_abs_value(a_abs_sorted, end_i)
 
-    indices_mask = (start_top_k <= torch.abs(a_dist)) & (torch.abs(a_dist) <= end_top_k)
+    indices_mask = (start_top_k <= a_abs_dist) & (a_abs_dist <= end_top_k)
     if region_is_inverted:
         indices_mask = ~indices_mask
-    indices_mask = torch.gather(indices_mask.float(), 0, redist_indices)
+    # scattering along b_indices places the i-th smallest value at the position of the i-th smallest value of b
+    indices_mask = torch.empty_like(indices_mask).scatter_(0, b_indices, indices_mask)
 
-    a_redist = torch.gather(a_dist, 0, redist_indices)
-    a_redist = (1 - indices_mask) * a_flat + indices_mask * a_redist
+    a_redist = torch.empty_like(a_dist).scatter_(0, b_indices, a_dist)
+    a_redist = torch.where(indices_mask, a_redist, a_flat)
     return a_redist.reshape_as(a)
 
 
-def kth_abs_value(a: Tensor, k: int) -> Tensor:
+def inverse_permutation(indices: Tensor) -> Tensor:
+    # O(n) scatter instead of an O(n log n) argsort
+    inverse = torch.empty_like(indices)
+    inverse[indices] = torch.arange(indices.numel(), device=indices.device)
+    return inverse
+
+
+def kth_abs_value(a_abs_sorted: Tensor, k: int) -> Tensor:
     if k <= 0:
-        return torch.tensor(-1, device=a.device)
+        return torch.tensor(-1, device=a_abs_sorted.device)
     else:
-        return torch.kthvalue(torch.abs(a.float()), k)[0]
+        return a_abs_sorted[k - 1]
 
 
 def ratio_to_region(width: float, offset: float, n: int) -> Tuple[int, int, bool]:
@@ -305,10 +320,12 @@ def train_difference(
     alpha: Hyper = 1.0,
     **kwargs,
 ) -> Tensor | SameMergeSpace:
-    threshold = torch.maximum(torch.abs(a - c), torch.abs(b - c))
-    dissimilarity = torch.clamp(torch.nan_to_num((c - a) * (b - c) / threshold**2, nan=0), 0)
+    ca = c - a
+    bc = b - c
+    threshold = torch.maximum(torch.abs(ca), torch.abs(bc))
+    dissimilarity = ca.mul_(bc).div_(threshold.pow_(2)).nan_to_num_(nan=0).clamp_min_(0)
 
-    return a + (b - c) * alpha * dissimilarity
+    return torch.addcmul(a, bc, dissimilarity, value=alpha)
 
 
 @convert_to_recipe
@@ -320,19 +337,18 @@ def multiply_quotient(
     alpha: Hyper = 1.0,
     **kwargs,
 ) -> Tensor | SameMergeSpace:
-    ac_log = torch.log(a.abs()) - torch.log(c.abs())
-    bc_log = torch.log(b.abs()) - torch.log(c.abs())
-
-    b = torch.complex(b, torch.zeros_like(b))
-    c = torch.complex(c, torch.zeros_like(c))
+    c_log = torch.log(c.abs())
+    ac_log = torch.log(a.abs()) - c_log
+    bc_log = torch.log(b.abs()) - c_log
 
     threshold = torch.maximum(torch.abs(ac_log), torch.abs(bc_log))
     alpha *= torch.clamp(-torch.nan_to_num(ac_log * bc_log / threshold**2, nan=0), 0)
 
-    res = a * (b / c)**alpha
+    # real part of a * (b / c)**alpha: |b / c|**alpha in log space, negative quotients rotate the phase
+    quotient_is_negative = torch.sign(b) * torch.sign(c) < 0
+    res = a * torch.exp(alpha * bc_log) * torch.cos(math.pi * alpha * quotient_is_negative)
     res = torch.where(torch.isnan(res), a, res)
-    del a, b, c
-    return res.real
+    return res
 
 
 @convert_to_recipe
@@ -352,6 +368,10 @@ def distribution_crossover(
     if tilt == 1 or a.shape == ():
         return weighted_sum.__wrapped__(a, b, alpha=alpha)
 
+    dft_filter, filter_value = create_filter_cached((torch.numel(a) // 2 + 1,), float(alpha), float(tilt), a.device)
+    if filter_value is not None:
+        return weighted_sum.__wrapped__(a, b, alpha=filter_value)
+
     c_indices = torch.argsort(torch.flatten(c))
     a_dist = torch.gather(torch.flatten(a), 0, c_indices)
     b_dist = torch.gather(torch.flatten(b), 0, c_indices)
@@ -359,11 +379,9 @@ def distribution_crossover(
     a_dft = torch.fft.rfft(a_dist)
     b_dft = torch.fft.rfft(b_dist)
 
-    dft_filter = create_filter((a_dft.numel(),), alpha, tilt, device=a.device)
-
     x_dft = (1 - dft_filter) * a_dft + dft_filter * b_dft
     x_dist = torch.fft.irfft(x_dft, a_dist.shape[0])
-    x_values = torch.gather(x_dist, 0, torch.argsort(c_indices))
+    x_values = torch.gather(x_dist, 0, inverse_permutation(c_indices))
     return x_values.reshape_as(a)
 
 
@@ -388,15 +406,32 @@ def crossover(
 
     shape = a.shape
 
+    dft_shape = (*shape[:-1], shape[-1] // 2 + 1)
+    dft_filter, filter_value = create_filter_cached(dft_shape, float(alpha), float(tilt), a.device)
+    if filter_value is not None:
+        return weighted_sum.__wrapped__(a, b, alpha=filter_value)
+
     a_dft = torch.fft.rfftn(a, s=shape)
     b_dft = torch.fft.rfftn(b, s=shape)
 
-    dft_filter = create_filter(a_dft.shape, alpha, tilt, device=a.device)
-
     x_dft = (1 - dft_filter)*a_dft + dft_filter*b_dft
     return torch.fft.irfftn(x_dft, s=shape)
 
 
+@functools.lru_cache(maxsize=4)
+def create_filter_cached(shape: Tuple[int, ...], alpha: float, tilt: float, device: torch.device) -> Tuple[Tensor, Optional[float]]:
+    """
+    Same as `create_filter`, but memoized per device. The cache is kept small as filters can be large and live on the merge device.
+    Do not modify the returned filter in place.
+    :return: the filter, and its value if all of its elements are (nearly) the same, otherwise None
+    """
+    dft_filter = create_filter(shape, alpha, tilt, device)
+    filter_min, filter_max = dft_filter.min().item(), dft_filter.max().item()
+    if filter_max - filter_min < EPSILON:
+        return dft_filter, filter_min
+    return dft_filter, None
+
+
 def create_filter(shape: Tuple[int, ...] | torch.Size, alpha: float, tilt: float, device=None):
     """
     Create a crossover filter. The cut is first tilted around (0, 0), then slid along its normal until it touches the point (alpha, 1 - alpha).
@@ -467,8 +502,9 @@ def rotate(
     b_neurons = b.reshape(*shape_2d)
     a_centroid = a_neurons.mean(0)
     b_centroid = b_neurons.mean(0)
-    a_neurons -= a_centroid
-    b_neurons -= b_centroid
+    # reshape can return a view, center out of place to leave the inputs untouched
+    a_neurons = a_neurons - a_centroid
+    b_neurons = b_neurons - b_centroid
 
     alignment_is_float = alignment != round(alignment)
 
@@ -500,9 +536,8 @@ def rotate(
         # interpolate the relationship between the neurons
         a_neurons = weighted_sum.__wrapped__(a_neurons, b_neurons @ rotation.T, alpha=alpha)
 
-    a_neurons @= transform
-    a_neurons += weighted_sum.__wrapped__(a_centroid, b_centroid, alpha=alignment)
-    return a_neurons.reshape_as(a)
+    centroid = weighted_sum.__wrapped__(a_centroid, b_centroid, alpha=alignment)
+    return torch.addmm(centroid, a_neurons, transform).reshape_as(a)
 
 
 def orthogonal_procrustes(a, b, cancel_reflection: bool = False):
@@ -560,22 +595,22 @@ def clamp(
     stiffness: Hyper = 0.0,
     **kwargs,
 ) -> Tensor | SameMergeSpace:
-    maximums = functools.reduce(torch.maximum, bounds)
-    minimums = functools.reduce(torch.minimum, bounds)
+    stacked_bounds = torch.stack(bounds)
+    maximums = stacked_bounds.amax(dim=0)
+    minimums = stacked_bounds.amin(dim=0)
     centers = (maximums + minimums) / 2
 
     if stiffness:
-        smallest_positive = maximums
-        largest_negative = minimums
-
-        for i, bound in enumerate(bounds):
-            smallest_positive = torch.where((smallest_positive >= bound) & (bound >= centers), bound, smallest_positive)
-            largest_negative = torch.where((largest_negative <= bound) & (bound <= centers), bound, largest_negative)
+        # closest bound on each side of the centers. the extremes always qualify
+        above_centers = torch.where(stacked_bounds >= centers, stacked_bounds, stacked_bounds.new_full((), float("inf")))
+        below_centers = torch.where(stacked_bounds <= centers, stacked_bounds, stacked_bounds.new_full((), float("-inf")))
+        smallest_positive = above_centers.amin(dim=0)
+        largest_negative = below_centers.amax(dim=0)
 
         maximums = weighted_sum.__wrapped__(maximums, smallest_positive, alpha=stiffness)
         minimums = weighted_sum.__wrapped__(minimums, largest_negative, alpha=stiffness)
 
-    return torch.minimum(torch.maximum(a, minimums), maximums)
+    return torch.clamp(a, min=minimums, max=maximums)
 
 
 @convert_to_recipe
@@ -589,22 +624,22 @@ def dropout(  # aka n-supermario
     **kwargs,
 ) -> Tensor | LiftFlag[MergeSpace.DELTA]:
     deltas = torch.stack((delta0,) + deltas)
-    rng = np.random.default_rng(seed)
+    generator = torch.Generator(device=delta0.device)
+    if seed is not None:
+        generator.manual_seed(int(seed))
+    else:
+        generator.seed()
 
     if overlap % 2 == 1:
-        masks = torch.stack([
-            torch.from_numpy(rng.binomial(n=1, p=1 - probability, size=delta0.shape)).to(device=delta0.device, dtype=torch.bool)
-            for _ in range(len(deltas))
-        ])
+        masks = torch.empty(deltas.shape, dtype=torch.bool, device=delta0.device)
+        masks.view(torch.uint8).bernoulli_(1 - probability, generator=generator)
     else:
-        ks = np.arange(2 ** len(deltas))
         pmf = overlapping_sets_pmf(len(deltas), probability, overlap, overlap_emphasis)
-        masks = torch.from_numpy(rng.choice(ks, size=delta0.shape, p=pmf)).to(delta0.device)
+        pmf = torch.from_numpy(pmf).to(delta0.device)
+        masks = torch.multinomial(pmf, delta0.numel(), replacement=True, generator=generator).reshape(delta0.shape)
         masks = torch.stack([masks & 2 ** i != 0 for i in range(len(deltas))])
 
-    final_delta = torch.zeros_like(delta0)
-    for mask, delta in zip(masks, deltas):
-        final_delta[mask] += delta[mask]
+    final_delta = deltas.mul_(masks).sum(dim=0)
     return final_delta / masks.sum(0).clamp(1) / (1 - probability)
 
 # Part of TIES w/ DARE
@@ -627,12 +662,21 @@ def ties_sum_with_dropout(
     seed: Hyper = None,
     **kwargs,
 ) -> Tensor | LiftFlag[MergeSpace.DELTA]:
+    deltas = torch.stack(deltas)
+
     # Set seed
-    torch.manual_seed(seed)
+    generator = torch.Generator(device=deltas.device)
+    if seed is not None:
+        generator.manual_seed(int(seed))
+    else:
+        generator.seed()
 
     # Under "Dropout", delta will be 0 by definition. Multiply it (Hadamard product) will return 0 also.
     # $$ \tilde{\delta}^t = (1 - m^t) \odot \delta^t $$
-    deltas = [delta * torch.bernoulli(torch.full(delta.shape, 1 - probability)) for delta in deltas]
+    # One mask for all deltas at once. Sampled in float32 like the original per-delta masks,
+    # so that a cpu seed draws the same sequence regardless of the merge dtype.
+    deltas.mul_(torch.bernoulli(torch.full(deltas.shape, 1 - probability, device=deltas.device), generator=generator))
+    deltas = torch.unbind(deltas)
 
     # $$ \tilde{\delta}^t = \tau_m = \hat{\tau}_t $$ O(N) in space
     deltas = ties_sum.__wrapped__(*deltas, k=k, vote_sgn=vote_sgn, apply_stock=apply_stock, cos_eps=cos_eps, apply_median=apply_median, eps=eps, maxiter=maxiter, ftol=ftol)
@@ -650,34 +694,31 @@ def ties_sum_with_dropout(
         return deltas
 
 def overlapping_sets_pmf(n, p, overlap, overlap_emphasis):
+    # number of sets in each non-empty subset i, for i in [1, 2**n)
+    num_sets = ((np.arange(1, 2 ** n)[:, None] >> np.arange(n)) & 1).sum(axis=1)
+
     if np.isclose(overlap, round(overlap)):
         if round(overlap) % 2 == 0:
-            pmf = np.array([1/n*float(bin(i).count("1") == 1) for i in range(1, 2**n)])
+            pmf = (num_sets == 1) / n
         else:
-            pmf = np.array([0 for _ in range(1, 2**n - 1)] + [1])
+            pmf = (num_sets == n).astype(np.float64)
     else:
         if math.floor(overlap) % 2 == 1:
             overlap = -overlap
 
         tan_overlap = np.tan(np.pi * (overlap - 0.5))
-        pmf = np.zeros(2 ** n - 1)
-        for i in range(1, 2 ** n):
-            num_sets = bin(i).count("1")
-            pmf[i-1] = tan_overlap*(num_sets - n/2)
+        pmf = tan_overlap*(num_sets - n/2)
         pmf = np.exp(pmf) / np.sum(np.exp(pmf))
 
     binomial_pmf = binom.pmf(np.arange(1, n + 1), n, p)
-    expanded_binomial_pmf = np.zeros(2 ** n - 1)
-    for i in range(1, 2 ** n):
-        num_sets = bin(i).count("1")
-        expanded_binomial_pmf[i-1] = binomial_pmf[num_sets-1] / binomial_coefficient_np(n, num_sets)
+    binomial_coefficients = np.array([binomial_coefficient_np(n, k) for k in range(1, n + 1)])
+    expanded_binomial_pmf = (binomial_pmf / binomial_coefficients)[num_sets - 1]
     expanded_binomial_pmf /= expanded_binomial_pmf.sum()
 
-    pmf = weighted_sum.__wrapped__(
-        pmf,
-        weighted_sum.__wrapped__(pmf, expanded_binomial_pmf, alpha=1-abs(2*overlap-1)),
-        alpha=overlap_emphasis,
-    )
+    # numpy arrays, torch.lerp does not apply here
+    emphasis_alpha = 1-abs(2*overlap-1)
+    emphasized_pmf = (1 - emphasis_alpha) * pmf + emphasis_alpha * expanded_binomial_pmf
+    pmf = (1 - overlap_emphasis) * pmf + overlap_emphasis * emphasized_pmf
     return np.concatenate([[p], pmf * (1 - p)])
 
 def binomial_coefficient_np(n, k):
@@ -710,16 +751,22 @@ def model_stock_for_tensor(
 # The guess from mergekit: Average of cos(theta). Expected value is 0, somehow match with paper.
 # However this may be very unstable, and the range is still -1 to 1.
 def get_model_stock_t(deltas, cos_eps):
-    n = len(deltas)
-
-    # Generator function. Default eps from torch API doc.
-    cos = torch.nn.CosineSimilarity(dim=-1, eps=cos_eps)
+    stacked = deltas if isinstance(deltas, Tensor) else torch.stack(deltas)
+    n = stacked.shape[0]
+    if n < 2:
+        raise ValueError(f"model stock needs at least 2 deltas, got {n}")
+    if stacked.dim() == 1:
+        # 0-dim deltas, reduce each one on its own instead of across the stack
+        stacked = stacked.unsqueeze(-1)
+
+    # Cosine similarity of every consecutive pair at once, same formula as torch.nn.CosineSimilarity.
+    # Norms are computed once per delta and shared by both pairs it belongs to.
+    norms = torch.linalg.vector_norm(stacked, dim=-1)
+    dots = (stacked[:-1] * stacked[1:]).sum(dim=-1)
+    cos_thetas = dots / (norms[:-1] * norms[1:]).clamp_min(cos_eps)
 
-    # One-liner is all you need. I may make it in running average if it really memory hungry.
-    cos_thetas = [cos(deltas[i], deltas[i + 1]) for i, _ in enumerate(deltas) if (i + 1) < n]
-    
     # Still a vector.
-    cos_theta = torch.stack(cos_thetas).mean(dim=0)
+    cos_theta = cos_thetas.mean(dim=0)
 
     # Convert to column vector for multiplication.
     t = (n * cos_theta / (1 + (n - 1) * cos_theta)).unsqueeze(-1)
@@ -738,37 +785,45 @@ def geometric_median(
     return geometric_median_list_of_array(models, eps, maxiter, ftol)
 
 # Original sourcecode: https://github.com/krishnap25/geom_median/blob/main/src/geom_median/torch/weiszfeld_list_of_array.py
-# Changed to "List comprehension" and rely on torch API only. It is now fully parallel.
+# Changed to a single stacked tensor and rely on torch API only. It is now fully parallel.
 def geometric_median_list_of_array(models, eps, maxiter, ftol):
+    # Stack once, every Weiszfeld step then broadcasts over the first dimension.
+    stacked = models if isinstance(models, Tensor) else torch.stack(models)
+
     # I think it is impossible to pass this from user space so I hardcode this instead.
     # Meanwhile I rename "points" as "models"
     # no_grad part is rare case: Merge algorithm under GPU is never heard.
-    weights = torch.ones(len(models), device=models[0].device)
+    weights = torch.ones(stacked.shape[0], device=stacked.device)
 
     # initialize median estimate at mean
-    median = weighted_average(models, weights)
+    median = weighted_average(stacked, weights)
     new_weights = weights
-    objective_value = geometric_median_objective(median, models, weights)
+    objective_value = geometric_median_objective(median, stacked, weights)
 
     # Weiszfeld iterations
     for _ in range(maxiter):
         prev_obj_value = objective_value
-        denom = torch.stack([l2distance(p, median) for p in models])
+        denom = l2distances(stacked, median)
         new_weights = weights / torch.clamp(denom, min=eps) 
-        median = weighted_average(models, new_weights)
+        median = weighted_average(stacked, new_weights)
 
-        objective_value = geometric_median_objective(median, models, weights)
+        objective_value = geometric_median_objective(median, stacked, weights)
         if abs(prev_obj_value - objective_value) <= ftol * objective_value:
             break
         
-    return weighted_average(models, new_weights)
+    return weighted_average(stacked, new_weights)
 
-def weighted_average(points, weights):
+def weighted_average(stacked, weights):
     # weighted_average_component is not even required.
-    return torch.sum(torch.stack([p * weights[i] for i, p in enumerate(points)]), dim=0) / weights.sum()
-
-def geometric_median_objective(median, points, weights):
-    return torch.mean(torch.stack([l2distance(point, median) for point in points]) * weights)
-
-def l2distance(p1, p2):
-    return torch.dist(p1, p2, p=2)
\ No newline at end of file
+    # weights stay in float32, they are only cast to the model dtype once normalized
+    return torch.einsum("n,n...->...", (weights / weights.sum()).to(stacked.dtype), stacked)
+
+def geometric_median_objective(median, stacked, weights):
+    return torch.dot(l2distances(stacked, median).to(weights.dtype), weights) / weights.numel()
+
+def l2distances(stacked, p):
+    # Distance of every point in the stack to p, in one reduction.
+    if stacked.dim() == 1:
+        # an empty dim would reduce over the whole stack
+        return torch.abs(stacked - p)
+    return torch.linalg.vector_norm(stacked - p, ord=2, dim=tuple(range(1, stacked.dim())))
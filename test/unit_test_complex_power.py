@@ -0,0 +1,61 @@
+import torch
+import sd_mecha
+
+# Mixed signs and zeros, in float64 to compare with the complex formulation.
+_a = torch.tensor([
+    [-1., 2., 0., 4.],
+    [4., -3., 2., 0.],
+    [0., 4., -1., -2.],
+    [-2., 1., -4., 0.5],
+], dtype=torch.float64)
+_b = torch.tensor([
+    [3., -4., 1., 0.],
+    [-2., -1., 0., 3.],
+    [-1., 2., 3., -4.],
+    [4., 0., -2., 1.],
+], dtype=torch.float64)
+_c = torch.tensor([
+    [1., 2., -1., 0.],
+    [-2., 1., 3., -0.5],
+    [0., -3., 2., 1.],
+    [2., -1., 0., 4.],
+], dtype=torch.float64)
+
+_alphas = [0.0, 0.3, 0.5, 0.75, 1.0]
+
+
+def _complex_geometric_sum(a, b, alpha):
+    a = torch.complex(a, torch.zeros_like(a))
+    b = torch.complex(b, torch.zeros_like(b))
+    return (a ** (1 - alpha) * b ** alpha).real
+
+
+def _complex_multiply_quotient(a, b, c, alpha):
+    ac_log = torch.log(a.abs()) - torch.log(c.abs())
+    bc_log = torch.log(b.abs()) - torch.log(c.abs())
+
+    b = torch.complex(b, torch.zeros_like(b))
+    c = torch.complex(c, torch.zeros_like(c))
+
+    threshold = torch.maximum(torch.abs(ac_log), torch.abs(bc_log))
+    alpha = alpha * torch.clamp(-torch.nan_to_num(ac_log * bc_log / threshold**2, nan=0), 0)
+
+    res = a * (b / c)**alpha
+    res = torch.where(torch.isnan(res), a, res)
+    return res.real
+
+
+for _alpha in _alphas:
+    _actual = sd_mecha.geometric_sum.__wrapped__(_a, _b, alpha=_alpha)
+    _expected = _complex_geometric_sum(_a, _b, _alpha)
+    assert torch.allclose(_actual, _expected, atol = 0.0001, equal_nan=True)
+
+# Quotients of the same sign, of opposite signs, and with zeros in every position.
+for _alpha in _alphas:
+    for _x, _y, _z in [(_a, _b, _c), (_b, _c, _a), (_c, _a, _b), (_a, -_b, _c)]:
+        _actual = sd_mecha.merge_methods.multiply_quotient.__wrapped__(_x, _y, _z, alpha=_alpha)
+        _expected = _complex_multiply_quotient(_x, _y, _z, _alpha)
+        # b == 0 forces alpha to 0 there. complex 0 ** 0 is not guaranteed to be 1, the real version returns a
+        _defined = (_y != 0) | (_z == 0)
+        assert torch.allclose(_actual[_defined], _expected[_defined], atol = 0.0001, equal_nan=True)
+        assert torch.equal(_actual[~_defined], _x[~_defined])
@@ -0,0 +1,61 @@
+import torch
+import sd_mecha
+
+torch.manual_seed(114514)
+
+
+# Uncached FFT path, as crossover and distribution_crossover computed it before filters were cached.
+def _fft_crossover(a, b, alpha, tilt):
+    shape = a.shape
+    a_dft = torch.fft.rfftn(a, s=shape)
+    b_dft = torch.fft.rfftn(b, s=shape)
+    dft_filter = sd_mecha.merge_methods.create_filter(a_dft.shape, alpha, tilt, device=a.device)
+    x_dft = (1 - dft_filter)*a_dft + dft_filter*b_dft
+    return torch.fft.irfftn(x_dft, s=shape)
+
+
+def _fft_distribution_crossover(a, b, c, alpha, tilt):
+    c_indices = torch.argsort(torch.flatten(c))
+    a_dist = torch.gather(torch.flatten(a), 0, c_indices)
+    b_dist = torch.gather(torch.flatten(b), 0, c_indices)
+    a_dft = torch.fft.rfft(a_dist)
+    b_dft = torch.fft.rfft(b_dist)
+    dft_filter = sd_mecha.merge_methods.create_filter((a_dft.numel(),), alpha, tilt, device=a.device)
+    x_dft = (1 - dft_filter) * a_dft + dft_filter * b_dft
+    x_dist = torch.fft.irfft(x_dft, a_dist.shape[0])
+    x_values = torch.gather(x_dist, 0, torch.argsort(c_indices))
+    return x_values.reshape_as(a)
+
+
+_a = torch.randn(8, 6, dtype=torch.float64)
+_b = torch.randn(8, 6, dtype=torch.float64)
+_c = torch.randn(8, 6, dtype=torch.float64)
+
+for _alpha, _tilt in [(0.5, 0.0), (0.3, 0.25), (0.7, 0.5), (0.5, 1.5)]:
+    _expected = _fft_crossover(_a, _b, _alpha, _tilt)
+    # the second call reuses the cached filter
+    for _ in range(2):
+        _actual = sd_mecha.crossover.__wrapped__(_a, _b, alpha=_alpha, tilt=_tilt)
+        assert torch.allclose(_actual, _expected, atol = 0.0001)
+
+    _expected = _fft_distribution_crossover(_a, _b, _c, _alpha, _tilt)
+    for _ in range(2):
+        _actual = sd_mecha.distribution_crossover.__wrapped__(_a, _b, _c, alpha=_alpha, tilt=_tilt)
+        assert torch.allclose(_actual, _expected, atol = 0.0001)
+
+assert sd_mecha.merge_methods.create_filter_cached.cache_info().hits > 0
+
+# Single frequency: the filter is constant, so the FFTs are skipped.
+_a1 = torch.tensor([[1.5]], dtype=torch.float64)
+_b1 = torch.tensor([[-2.]], dtype=torch.float64)
+_c1 = torch.tensor([[0.25]], dtype=torch.float64)
+
+for _alpha, _tilt in [(0.5, 0.0), (0.3, 0.25)]:
+    _, _filter_value = sd_mecha.merge_methods.create_filter_cached((1, 1), _alpha, _tilt, _a1.device)
+    assert _filter_value is not None
+
+    _actual = sd_mecha.crossover.__wrapped__(_a1, _b1, alpha=_alpha, tilt=_tilt)
+    assert torch.allclose(_actual, _fft_crossover(_a1, _b1, _alpha, _tilt), atol = 0.0001)
+
+    _actual = sd_mecha.distribution_crossover.__wrapped__(_a1, _b1, _c1, alpha=_alpha, tilt=_tilt)
+    assert torch.allclose(_actual, _fft_distribution_crossover(_a1, _b1, _c1, _alpha, _tilt), atol = 0.0001)
@@ -72,4 +72,12 @@ assert torch.allclose(_with_dare, _expected2, atol = 0.0001)
 
 _dare_only = sd_mecha.ties_sum_with_dropout.__wrapped__(*_models, probability=_probability, no_rescale=_no_rescale, k=_k, vote_sgn=_use_signs, seed=_seed, apply_stock = _no_stock, cos_eps = _cos_eps)
 #print(_dare_only)
-assert torch.allclose(_dare_only, _expected3, atol = 0.0001)
\ No newline at end of file
+assert torch.allclose(_dare_only, _expected3, atol = 0.0001)
+# 0-dim keys (e.g. logit_scale). All deltas point the same way, so t is 1 and both reduce to the mean.
+_scalar_models = [torch.tensor(2.), torch.tensor(3.), torch.tensor(4.)]
+
+_scalar_stock = sd_mecha.model_stock_for_tensor.__wrapped__(*_scalar_models, cos_eps = _cos_eps)
+assert torch.allclose(_scalar_stock, torch.tensor([3.]), atol = 0.0001)
+
+_scalar_ties_stock = sd_mecha.ties_sum.__wrapped__(*_scalar_models, k=_k, apply_stock = _apply_stock, cos_eps = _cos_eps)
+assert torch.allclose(_scalar_ties_stock, torch.tensor([3.]), atol = 0.0001)
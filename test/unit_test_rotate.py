@@ -0,0 +1,27 @@
+import torch
+import sd_mecha
+
+torch.manual_seed(114514)
+
+# rotate reshapes its inputs, which can return views. Centering must not write through them.
+_a = torch.randn(8, 8, dtype=torch.float64)
+_b = torch.randn(8, 8, dtype=torch.float64)
+_a_copy = _a.clone()
+_b_copy = _b.clone()
+
+for _alignment, _alpha in [(1.0, 0.0), (1.0, 0.5), (0.5, 0.0), (2.0, 0.25)]:
+    _actual = sd_mecha.merge_methods.rotate.__wrapped__(_a, _b, alignment=_alignment, alpha=_alpha)
+    assert _actual.shape == _a.shape
+    assert torch.equal(_a, _a_copy)
+    assert torch.equal(_b, _b_copy)
+
+# 4D conv weights go through the other reshape branch.
+_conv_a = torch.randn(4, 4, 3, 3, dtype=torch.float64)
+_conv_b = torch.randn(4, 4, 3, 3, dtype=torch.float64)
+_conv_a_copy = _conv_a.clone()
+_conv_b_copy = _conv_b.clone()
+
+_actual = sd_mecha.merge_methods.rotate.__wrapped__(_conv_a, _conv_b, alignment=1.0, alpha=0.5)
+assert _actual.shape == _conv_a.shape
+assert torch.equal(_conv_a, _conv_a_copy)
+assert torch.equal(_conv_b, _conv_b_copy)